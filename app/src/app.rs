@@ -1,8 +1,13 @@
+use std::time::Duration;
+
 use crate::{data::DataManager, kit};
 use eframe::egui;
 use ergot::socket::topic::std_bounded::BoxedReceiverHandle;
 use loeti_protocol::{MeasurementTopic, StatusTopic};
 
+/// The interval between redraws of the plots (approx. 30 Hz).
+const REPAINT_INTERVAL: Duration = Duration::from_millis(33);
+
 /// The application that plots PID and temperature data.
 pub struct PlotApp {
     pub data: crate::data::DataManager,
@@ -37,16 +42,18 @@ impl PlotApp {
 
 impl eframe::App for PlotApp {
     fn update(&mut self, ctx: &egui::Context, _frame: &mut eframe::Frame) {
-        if let Some(msg) = self.measurement_receiver.try_recv() {
+        // Drain everything that arrived since the last frame, so that redraws do not fall behind the
+        // rate of incoming messages.
+        while let Some(msg) = self.measurement_receiver.try_recv() {
             self.data.push(&msg.t);
         }
 
-        if let Some(msg) = self.status_receiver.try_recv() {
+        while let Some(msg) = self.status_receiver.try_recv() {
             self.data.update_status(msg.t);
         }
 
         self.plot(ctx);
 
-        ctx.request_repaint();
+        ctx.request_repaint_after(REPAINT_INTERVAL);
     }
 }
@@ -3,6 +3,9 @@
 use egui_plot::PlotPoint;
 use loeti_protocol::{Measurement, Status};
 
+/// The longest duration of history that can be plotted.
+pub const MAX_PLOT_DURATION_S: f64 = 3600.0;
+
 /// Slices of data to plot.
 pub struct DataSlices<'d> {
     pub outputs: &'d [PlotPoint],
@@ -13,6 +16,17 @@ pub struct DataSlices<'d> {
     pub set_temperatures_deg_c: &'d [PlotPoint],
 }
 
+/// Reused buffers for decimated data.
+#[derive(Default)]
+struct DecimatedData {
+    outputs: Vec<PlotPoint>,
+    ps: Vec<PlotPoint>,
+    is: Vec<PlotPoint>,
+    ds: Vec<PlotPoint>,
+    temperatures_deg_c: Vec<PlotPoint>,
+    set_temperatures_deg_c: Vec<PlotPoint>,
+}
+
 /// Manages data received from the device.
 pub struct DataManager {
     pub status: Status,
@@ -23,6 +37,62 @@ pub struct DataManager {
     ds: Vec<PlotPoint>,
     temperatures_deg_c: Vec<PlotPoint>,
     set_temperatures_deg_c: Vec<PlotPoint>,
+    decimated: DecimatedData,
+}
+
+/// Decimate points into time intervals of equal duration (M4 aggregation).
+///
+/// Bins are aligned to multiples of `bin_duration_s`, so that they do not move as new data
+/// arrives. Per bin, the first, minimum, maximum and last points are kept, in their original order.
+/// If a bin is one pixel column wide, the drawn line looks the same as with all points. Non-finite
+/// values are never chosen as minimum or maximum, but are kept when they are first or last in a
+/// bin.
+fn decimate(points: &[PlotPoint], bin_duration_s: f64, decimated: &mut Vec<PlotPoint>) {
+    decimated.clear();
+
+    let Some(first) = points.first() else {
+        return;
+    };
+
+    let mut push_bin = |first: usize, min: Option<usize>, max: Option<usize>, last: usize| {
+        let (min, max) = (min.unwrap_or(first), max.unwrap_or(first));
+        let mut previous = None;
+
+        for index in [first, min.min(max), min.max(max), last] {
+            if previous != Some(index) {
+                decimated.push(points[index]);
+                previous = Some(index);
+            }
+        }
+    };
+
+    let mut bin = (first.x / bin_duration_s).floor();
+    let mut bin_first = 0;
+    let mut bin_min: Option<usize> = None;
+    let mut bin_max: Option<usize> = None;
+
+    for (index, point) in points.iter().enumerate() {
+        let point_bin = (point.x / bin_duration_s).floor();
+
+        if point_bin != bin {
+            push_bin(bin_first, bin_min, bin_max, index - 1);
+            bin = point_bin;
+            bin_first = index;
+            bin_min = None;
+            bin_max = None;
+        }
+
+        if point.y.is_finite() {
+            if bin_min.is_none_or(|min| point.y < points[min].y) {
+                bin_min = Some(index);
+            }
+            if bin_max.is_none_or(|max| point.y > points[max].y) {
+                bin_max = Some(index);
+            }
+        }
+    }
+
+    push_bin(bin_first, bin_min, bin_max, points.len() - 1);
 }
 
 impl Default for DataManager {
@@ -43,6 +113,7 @@ impl DataManager {
             ds: Vec::new(),
             temperatures_deg_c: Vec::new(),
             set_temperatures_deg_c: Vec::new(),
+            decimated: Default::default(),
         }
     }
 
@@ -61,10 +132,54 @@ impl DataManager {
         self.status = status
     }
 
+    /// Drop all data points.
+    fn clear(&mut self) {
+        self.outputs.clear();
+        self.ps.clear();
+        self.is.clear();
+        self.ds.clear();
+        self.temperatures_deg_c.clear();
+        self.set_temperatures_deg_c.clear();
+    }
+
+    /// Drop all data points that are older than the given timestamp.
+    ///
+    /// Relies on timestamps being ascending, which [`Self::push`] ensures.
+    fn trim(&mut self, oldest_timestamp_s: f64) {
+        let count = self
+            .temperatures_deg_c
+            .partition_point(|point| point.x < oldest_timestamp_s);
+
+        self.outputs.drain(..count);
+        self.ps.drain(..count);
+        self.is.drain(..count);
+        self.ds.drain(..count);
+        self.temperatures_deg_c.drain(..count);
+        self.set_temperatures_deg_c.drain(..count);
+    }
+
     /// Push a new measurement.
+    ///
+    /// Timestamps are the device's uptime. If one goes backwards (the device was restarted), the
+    /// previous data is dropped, so that the stored timestamps are always ascending.
+    ///
+    /// History beyond the maximum plot duration is discarded. Trimming only happens once twice that
+    /// duration has accumulated, so that moving the remaining points is amortized over many pushes.
     pub fn push(&mut self, measurement: &Measurement) {
         let x = measurement.time_ms as f64 / 1000.0;
 
+        if self.last_timestamp_s().is_some_and(|last| x < last) {
+            self.clear();
+        }
+
+        if self
+            .temperatures_deg_c
+            .first()
+            .is_some_and(|point| point.x < x - 2.0 * MAX_PLOT_DURATION_S)
+        {
+            self.trim(x - MAX_PLOT_DURATION_S);
+        }
+
         if let Some((pid, output)) = measurement.pid_state.as_ref() {
             self.outputs.push(PlotPoint {
                 x,
@@ -91,28 +206,164 @@ impl DataManager {
     }
 
     /// Get the current data slices.
-    pub fn get(&mut self) -> Option<DataSlices<'_>> {
-        let first_timestamp_s = self.last_timestamp_s()? - self.plot_duration_s;
+    ///
+    /// If `bin_duration_s` is given (e.g. the duration that one pixel column of the plot covers),
+    /// and there are more than four points per bin, the slices are decimated. This keeps drawing
+    /// cost bounded by the plot width, independent of the plot duration.
+    pub fn get(&mut self, bin_duration_s: Option<f64>) -> Option<DataSlices<'_>> {
+        let last_timestamp_s = self.last_timestamp_s()?;
+        let first_timestamp_s = last_timestamp_s - self.plot_duration_s;
 
-        let mut start = None;
-        for (rev_index, point) in self.temperatures_deg_c.iter().rev().enumerate() {
-            let t = point.x;
+        // `push` keeps timestamps ascending, so the start can be found by binary search. Include the
+        // last point at or before the first timestamp, so that the plot starts at the left border.
+        let start = self
+            .temperatures_deg_c
+            .partition_point(|point| point.x <= first_timestamp_s)
+            .saturating_sub(1);
 
-            if t <= first_timestamp_s {
-                start = Some(self.temperatures_deg_c.len() - rev_index - 1);
-                break;
-            }
-        }
+        let len = self.temperatures_deg_c.len() - start;
+        let duration_s = last_timestamp_s - self.temperatures_deg_c[start].x;
+
+        let Some(bin_duration_s) = bin_duration_s
+            .filter(|&bin_duration_s| len as f64 > 4.0 * (duration_s / bin_duration_s + 1.0))
+        else {
+            return Some(DataSlices {
+                outputs: &self.outputs[start..],
+                ps: &self.ps[start..],
+                is: &self.is[start..],
+                ds: &self.ds[start..],
+                temperatures_deg_c: &self.temperatures_deg_c[start..],
+                set_temperatures_deg_c: &self.set_temperatures_deg_c[start..],
+            });
+        };
 
-        let start = start.unwrap_or_default();
+        let decimated = &mut self.decimated;
+        decimate(
+            &self.outputs[start..],
+            bin_duration_s,
+            &mut decimated.outputs,
+        );
+        decimate(&self.ps[start..], bin_duration_s, &mut decimated.ps);
+        decimate(&self.is[start..], bin_duration_s, &mut decimated.is);
+        decimate(&self.ds[start..], bin_duration_s, &mut decimated.ds);
+        decimate(
+            &self.temperatures_deg_c[start..],
+            bin_duration_s,
+            &mut decimated.temperatures_deg_c,
+        );
+        decimate(
+            &self.set_temperatures_deg_c[start..],
+            bin_duration_s,
+            &mut decimated.set_temperatures_deg_c,
+        );
 
         Some(DataSlices {
-            outputs: &self.outputs[start..],
-            ps: &self.ps[start..],
-            is: &self.is[start..],
-            ds: &self.ds[start..],
-            temperatures_deg_c: &self.temperatures_deg_c[start..],
-            set_temperatures_deg_c: &self.set_temperatures_deg_c[start..],
+            outputs: &decimated.outputs,
+            ps: &decimated.ps,
+            is: &decimated.is,
+            ds: &decimated.ds,
+            temperatures_deg_c: &decimated.temperatures_deg_c,
+            set_temperatures_deg_c: &decimated.set_temperatures_deg_c,
         })
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// Decimate points, given as `(x, y)` pairs, into bins of one second.
+    fn decimate_pairs(points: &[(f64, f64)]) -> Vec<(f64, f64)> {
+        let points: Vec<PlotPoint> = points.iter().map(|&(x, y)| PlotPoint { x, y }).collect();
+        let mut decimated = Vec::new();
+        decimate(&points, 1.0, &mut decimated);
+
+        decimated.iter().map(|point| (point.x, point.y)).collect()
+    }
+
+    /// Compare points, treating NaN values as equal.
+    fn assert_points_eq(actual: &[(f64, f64)], expected: &[(f64, f64)]) {
+        let same = |a: f64, b: f64| a == b || (a.is_nan() && b.is_nan());
+
+        assert_eq!(actual.len(), expected.len(), "{actual:?} != {expected:?}");
+        for (a, e) in actual.iter().zip(expected) {
+            assert!(
+                same(a.0, e.0) && same(a.1, e.1),
+                "{actual:?} != {expected:?}"
+            );
+        }
+    }
+
+    #[test]
+    fn empty() {
+        assert_points_eq(&decimate_pairs(&[]), &[]);
+    }
+
+    #[test]
+    fn single_point() {
+        assert_points_eq(&decimate_pairs(&[(0.5, 1.0)]), &[(0.5, 1.0)]);
+    }
+
+    #[test]
+    fn keeps_first_min_max_last_in_order() {
+        let decimated = decimate_pairs(&[
+            (0.0, 2.0),
+            (0.1, 9.0),
+            (0.2, 3.0),
+            (0.3, -4.0),
+            (0.4, 1.0),
+            (0.5, 5.0),
+            (1.0, 7.0),
+            (1.2, 0.0),
+            (1.4, 8.0),
+            (1.6, 6.0),
+            (1.8, 7.5),
+        ]);
+
+        assert_points_eq(
+            &decimated,
+            &[
+                (0.0, 2.0),
+                (0.1, 9.0),
+                (0.3, -4.0),
+                (0.5, 5.0),
+                (1.0, 7.0),
+                (1.2, 0.0),
+                (1.4, 8.0),
+                (1.8, 7.5),
+            ],
+        );
+    }
+
+    #[test]
+    fn keeps_nan_runs_across_bins() {
+        let decimated = decimate_pairs(&[
+            (0.0, 1.0),
+            (0.5, f64::NAN),
+            (0.9, f64::NAN),
+            (1.2, f64::NAN),
+            (1.5, 2.0),
+        ]);
+
+        assert_points_eq(
+            &decimated,
+            &[(0.0, 1.0), (0.9, f64::NAN), (1.2, f64::NAN), (1.5, 2.0)],
+        );
+    }
+
+    #[test]
+    fn keeps_first_and_last_of_all_nan_bin() {
+        let decimated = decimate_pairs(&[
+            (0.5, 1.0),
+            (1.0, f64::NAN),
+            (1.5, f64::NAN),
+            (1.9, f64::NAN),
+            (2.5, 3.0),
+        ]);
+
+        assert_points_eq(
+            &decimated,
+            &[(0.5, 1.0), (1.0, f64::NAN), (1.9, f64::NAN), (2.5, 3.0)],
+        );
+    }
+}
@@ -1,8 +1,21 @@
 use eframe::egui::{self, Color32, FontId, RichText, Vec2b};
-use egui_plot::{Legend, Line, LineStyle, Plot, PlotPoints};
+use egui_plot::{Legend, Line, LineStyle, Plot, PlotBounds, PlotPoints};
 use loeti_protocol::{ControlState, ToolState};
 
-use crate::{app::PlotApp, data::DataManager};
+use crate::{
+    app::PlotApp,
+    data::{DataManager, MAX_PLOT_DURATION_S},
+};
+
+/// The duration that one pixel column covers, for the visible bounds of a plot.
+///
+/// This is `None` while the bounds are not yet known, e.g. on the first frame.
+fn pixel_duration_s(bounds: &PlotBounds, width_px: f32) -> Option<f64> {
+    let duration_s = bounds.width();
+
+    (duration_s.is_finite() && duration_s > 0.0 && width_px >= 1.0)
+        .then(|| duration_s / width_px as f64)
+}
 
 impl PlotApp {
     /// Plot PID outputs and temperatures.
@@ -31,7 +44,7 @@ impl PlotApp {
                 ui.separator();
 
                 ui.add(
-                    egui::Slider::new(&mut self.data.plot_duration_s, 10.0..=3600.0)
+                    egui::Slider::new(&mut self.data.plot_duration_s, 10.0..=MAX_PLOT_DURATION_S)
                         .logarithmic(true)
                         .text("Duration to plot")
                         .suffix(" s"),
@@ -63,58 +76,70 @@ impl PlotApp {
         });
 
         egui::CentralPanel::default().show(ctx, |ui| {
-            if let Some(slices) = self.data.get() {
-                let temperature: Line<'_> =
-                    Line::new("Current", PlotPoints::from(slices.temperatures_deg_c))
-                        .width(3.0)
-                        .color(Color32::LIGHT_GREEN);
-                let set_temperature =
-                    Line::new("Setpoint", PlotPoints::from(slices.set_temperatures_deg_c))
-                        .style(LineStyle::Dashed { length: 10.0 })
-                        .color(Color32::GRAY);
-
-                let control_output = Line::new("Output", PlotPoints::from(slices.outputs))
-                    .width(3.0)
-                    .color(Color32::LIGHT_GRAY);
-                let control_p = Line::new("P", PlotPoints::from(slices.ps));
-                let control_i = Line::new("I", PlotPoints::from(slices.is));
-                let control_d = Line::new("D", PlotPoints::from(slices.ds));
-
-                let plt_height = ui.available_height() / 2.0;
-
-                let link_group_id = ui.id().with("linked_plots");
-                let link_axis = Vec2b::new(true, false);
-                let link_cursor = Vec2b::new(true, false);
-
-                Plot::new("pid_plot")
-                    .legend(Legend::default())
-                    .y_axis_label("PID control")
-                    .height(plt_height)
-                    .width(ui.available_width())
-                    .link_axis(link_group_id, link_axis)
-                    .link_cursor(link_group_id, link_cursor)
-                    .set_margin_fraction([0.0, 0.2].into())
-                    .show(ui, |plot_ui| {
+            if self.data.last_timestamp_s().is_none() {
+                return;
+            }
+
+            let plt_height = ui.available_height() / 2.0;
+            let plt_width = ui.available_width();
+            let plt_width_px = plt_width * ctx.pixels_per_point();
+
+            let link_group_id = ui.id().with("linked_plots");
+            let link_axis = Vec2b::new(true, false);
+            let link_cursor = Vec2b::new(true, false);
+
+            Plot::new("pid_plot")
+                .legend(Legend::default())
+                .y_axis_label("PID control")
+                .height(plt_height)
+                .width(plt_width)
+                .link_axis(link_group_id, link_axis)
+                .link_cursor(link_group_id, link_cursor)
+                .set_margin_fraction([0.0, 0.2].into())
+                .show(ui, |plot_ui| {
+                    let bin_duration_s = pixel_duration_s(&plot_ui.plot_bounds(), plt_width_px);
+
+                    if let Some(slices) = self.data.get(bin_duration_s) {
+                        let control_output = Line::new("Output", PlotPoints::from(slices.outputs))
+                            .width(3.0)
+                            .color(Color32::LIGHT_GRAY);
+                        let control_p = Line::new("P", PlotPoints::from(slices.ps));
+                        let control_i = Line::new("I", PlotPoints::from(slices.is));
+                        let control_d = Line::new("D", PlotPoints::from(slices.ds));
+
                         plot_ui.line(control_output);
                         plot_ui.line(control_p);
                         plot_ui.line(control_i);
                         plot_ui.line(control_d);
-                    });
-
-                Plot::new("temperature_plot")
-                    .legend(Legend::default())
-                    .x_axis_label("Time / s")
-                    .y_axis_label("Temperature / °C")
-                    .height(plt_height)
-                    .width(ui.available_width())
-                    .link_axis(link_group_id, link_axis)
-                    .link_cursor(link_group_id, link_cursor)
-                    .set_margin_fraction([0.0, 0.2].into())
-                    .show(ui, |plot_ui| {
+                    }
+                });
+
+            Plot::new("temperature_plot")
+                .legend(Legend::default())
+                .x_axis_label("Time / s")
+                .y_axis_label("Temperature / °C")
+                .height(plt_height)
+                .width(plt_width)
+                .link_axis(link_group_id, link_axis)
+                .link_cursor(link_group_id, link_cursor)
+                .set_margin_fraction([0.0, 0.2].into())
+                .show(ui, |plot_ui| {
+                    let bin_duration_s = pixel_duration_s(&plot_ui.plot_bounds(), plt_width_px);
+
+                    if let Some(slices) = self.data.get(bin_duration_s) {
+                        let temperature: Line<'_> =
+                            Line::new("Current", PlotPoints::from(slices.temperatures_deg_c))
+                                .width(3.0)
+                                .color(Color32::LIGHT_GREEN);
+                        let set_temperature =
+                            Line::new("Setpoint", PlotPoints::from(slices.set_temperatures_deg_c))
+                                .style(LineStyle::Dashed { length: 10.0 })
+                                .color(Color32::GRAY);
+
                         plot_ui.line(temperature);
                         plot_ui.line(set_temperature);
-                    });
-            }
+                    }
+                });
         });
     }
 }